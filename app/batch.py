@@ -0,0 +1,75 @@
+import asyncio
+import contextlib
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+from .models import FeedbackRecord
+from .sheets import GoogleSheetClient
+
+logger = logging.getLogger(__name__)
+
+
+class FeedbackBatcher:
+    """Coalesces feedback records into batched sheet webhook calls.
+
+    Handlers ``submit`` records; a background task sends them in one request
+    once ``max_batch`` records are queued or ``flush_interval`` seconds have
+    passed since the first one arrived. Transient errors are already retried
+    by the sheet client, so a batch that still fails goes to ``on_failure``.
+    """
+
+    def __init__(
+        self,
+        sheets: GoogleSheetClient,
+        max_batch: int = 25,
+        flush_interval: float = 2.0,
+        max_queue: int = 500,
+        on_failure: Callable[[List[FeedbackRecord]], Awaitable[None]] | None = None,
+    ) -> None:
+        self._sheets = sheets
+        self._max_batch = max_batch
+        self._flush_interval = flush_interval
+        self._on_failure = on_failure
+        self.queue: asyncio.Queue[FeedbackRecord] = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, record: FeedbackRecord) -> None:
+        await self.queue.put(record)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Wait for queued records to be sent, then stop the background task."""
+        if self._task is None:
+            return
+        await self.queue.join()
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self.queue.get()]
+            try:
+                async with asyncio.timeout(self._flush_interval):
+                    while len(batch) < self._max_batch:
+                        batch.append(await self.queue.get())
+            except TimeoutError:
+                pass
+            await self._flush(batch)
+            for _ in batch:
+                self.queue.task_done()
+
+    async def _flush(self, batch: List[FeedbackRecord]) -> None:
+        try:
+            await self._sheets.append_feedback_batch(batch)
+            return
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Failed to write %s feedback records to Google Sheets: %s", len(batch), exc)
+        if self._on_failure is not None:
+            try:
+                await self._on_failure(batch)
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Failed to report unsaved feedback: %s", exc)
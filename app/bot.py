@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+import asyncio
+import io
 import logging
-from dataclasses import dataclass
-from datetime import datetime
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from functools import lru_cache
+from typing import Coroutine, Literal
 
 from aiogram import Bot, Dispatcher, Router
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
 from aiogram.filters import Command, CommandStart
+from aiogram.filters.callback_data import CallbackData
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import (
@@ -15,16 +22,17 @@ from aiogram.types import (
     Message,
 )
 
+from .batch import FeedbackBatcher
 from .config import Settings
 from .models import FeedbackRecord, User, VacancyAssignment
 from .sheets import GoogleSheetClient
 from .speech import SpeechToText
-from .storage import FeedbackBuffer, UserStore, VacancyStore
+from .storage import FeedbackBuffer, UserStore, VacancyStore, vacancy_key
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class AppContext:
     settings: Settings
     user_store: UserStore
@@ -32,6 +40,20 @@ class AppContext:
     feedback_buffer: FeedbackBuffer
     sheets: GoogleSheetClient | None
     speech: SpeechToText | None
+    batcher: FeedbackBatcher | None = None
+    background_tasks: set[asyncio.Task] = field(default_factory=set)
+
+    def spawn(self, coro: Coroutine, name: str) -> asyncio.Task:
+        """Run ``coro`` in the background, keeping a reference until it finishes."""
+        task = asyncio.create_task(coro, name=name)
+        self.background_tasks.add(task)
+        task.add_done_callback(self._background_done)
+        return task
+
+    def _background_done(self, task: asyncio.Task) -> None:
+        self.background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background task %s failed", task.get_name(), exc_info=task.exception())
 
 
 class RegistrationStates(StatesGroup):
@@ -41,278 +63,395 @@ class RegistrationStates(StatesGroup):
 
 
 class FeedbackStates(StatesGroup):
-    overall_rating = State()
     recruiter = State()
-    comms_rating = State()
-    timeliness_rating = State()
-    relevance_rating = State()
-    process_quality_rating = State()
+    collecting_ratings = State()
     recommendations = State()
     confirm = State()
 
 
+class FeedbackCb(CallbackData, prefix="fb"):
+    action: Literal["start", "remind"]
+    # vacancy_key() of the vacancy: raw ids may contain ":" or overflow the 64-byte callback limit.
+    vacancy: str
+
+
+@lru_cache(maxsize=1024)
 def feedback_keyboard(vacancy_id: str) -> InlineKeyboardMarkup:
+    key = vacancy_key(vacancy_id)
     return InlineKeyboardMarkup(
         inline_keyboard=[
-            [InlineKeyboardButton(text="Оставить отзыв сейчас", callback_data=f"start_feedback:{vacancy_id}")],
-            [InlineKeyboardButton(text="Напомнить позже", callback_data=f"remind_feedback:{vacancy_id}")],
+            [
+                InlineKeyboardButton(
+                    text="Оставить отзыв сейчас",
+                    callback_data=FeedbackCb(action="start", vacancy=key).pack(),
+                )
+            ],
+            [
+                InlineKeyboardButton(
+                    text="Напомнить позже",
+                    callback_data=FeedbackCb(action="remind", vacancy=key).pack(),
+                )
+            ],
         ]
     )
 
 
-async def send_feedback_request(bot: Bot, ctx: AppContext, vacancy: VacancyAssignment) -> None:
-    for manager_id in vacancy.hiring_manager_ids:
-        user = await ctx.user_store.get(manager_id)
-        if user and user.status != "active":
-            continue
-        text = (
-            f"Вакансия закрыта: {vacancy.vacancy_title}\n"
-            f"Рекрутер: {vacancy.recruiter_name}\n"
-            "Можете оставить отзыв сейчас?"
-        )
-        try:
-            await bot.send_message(manager_id, text, reply_markup=feedback_keyboard(vacancy.vacancy_id))
-        except Exception as exc:  # noqa: BLE001
-            logger.warning("Failed to send feedback request to %s: %s", manager_id, exc)
+class RateCb(CallbackData, prefix="rate"):
+    category: str
+    value: int
 
 
-def register_handlers(router: Router, ctx: AppContext) -> None:
-    @router.message(CommandStart())
-    async def start(message: Message) -> None:
-        await message.answer("Здравствуйте! Используйте /register, чтобы подтвердить доступ, или ждите запрос на отзыв.")
+# (FSM data key, button label, question) for each row of the rating grid.
+_RATING_CATEGORIES = (
+    ("overall_rating", "Общая", "Общая оценка работы рекрутера"),
+    ("comms_rating", "Коммуникация", "Как оцениваете коммуникацию с рекрутером?"),
+    ("timeliness_rating", "Сроки", "Вакансия закрыта в комфортные сроки?"),
+    ("relevance_rating", "Кандидаты", "Насколько релевантны кандидаты?"),
+    (
+        "process_quality_rating",
+        "Процесс",
+        "Как оцениваете качество процесса (ошибки, фидбек, поддержка, HR-интервью)?",
+    ),
+)
+_RATING_QUESTIONS = {key: question for key, _, question in _RATING_CATEGORIES}
 
-    @router.message(Command("register"))
-    async def register(message: Message, state: FSMContext) -> None:
-        existing = await ctx.user_store.get(message.from_user.id)
-        if existing:
-            await message.answer("Вы уже зарегистрированы. Спасибо!")
-            return
-        await state.set_state(RegistrationStates.waiting_full_name)
-        await message.answer("Укажите ваше ФИО для завершения регистрации.")
-
-    @router.message(RegistrationStates.waiting_full_name)
-    async def save_full_name(message: Message, state: FSMContext) -> None:
-        await state.update_data(full_name=message.text.strip())
-        await state.set_state(RegistrationStates.waiting_title)
-        await message.answer("Ваша должность?")
-
-    @router.message(RegistrationStates.waiting_title)
-    async def save_title(message: Message, state: FSMContext) -> None:
-        await state.update_data(title=message.text.strip())
-        await state.set_state(RegistrationStates.waiting_contact)
-        await message.answer("Контакт (email/телефон)?")
-
-    @router.message(RegistrationStates.waiting_contact)
-    async def finish_registration(message: Message, state: FSMContext) -> None:
-        data = await state.get_data()
-        user = User(
-            telegram_id=message.from_user.id,
-            full_name=data.get("full_name", message.from_user.full_name or ""),
-            title=data.get("title"),
-            contact=message.text.strip(),
-            permission_level="hiring_manager",
-        )
-        await ctx.user_store.upsert(user)
-        await state.clear()
-        await message.answer("Вы успешно зарегистрированы. Спасибо!")
-
-    @router.callback_query(lambda c: c.data and c.data.startswith("start_feedback:"))
-    async def handle_start_feedback(callback: CallbackQuery, state: FSMContext) -> None:
-        await callback.answer()
-        vacancy_id = callback.data.split(":", maxsplit=1)[1]
-        vacancy = await ctx.vacancy_store.get(vacancy_id)
-        if not vacancy:
-            await callback.message.answer("Не могу найти вакансию. Напишите администратору.")
-            return
-        user = await ctx.user_store.get(callback.from_user.id)
-        if not user:
-            await callback.message.answer(
-                f"Вы не зарегистрированы. Напишите администратору ({ctx.settings.admin_contact})."
+_RATINGS_PROMPT = "Оцените работу рекрутера от 1 до 5, выбрав оценку в каждой строке:\n" + "\n".join(
+    f"• {label} — {question}" for _, label, question in _RATING_CATEGORIES
+)
+
+
+@lru_cache(maxsize=256)
+def ratings_keyboard(selected: tuple[int | None, ...]) -> InlineKeyboardMarkup:
+    rows = []
+    for (key, label, _), chosen in zip(_RATING_CATEGORIES, selected):
+        row = [InlineKeyboardButton(text=label, callback_data=RateCb(category=key, value=0).pack())]
+        for value in range(1, 6):
+            row.append(
+                InlineKeyboardButton(
+                    text=f"✅{value}" if value == chosen else str(value),
+                    callback_data=RateCb(category=key, value=value).pack(),
+                )
             )
+        rows.append(row)
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def _selected_ratings(data: dict) -> tuple[int | None, ...]:
+    return tuple(data.get(key) for key, _, _ in _RATING_CATEGORIES)
+
+
+_RECRUITER_TEMPLATE = (
+    "С каким рекрутером вы работали? (по умолчанию: {recruiter_name})\n"
+    "Введите имя или напишите 'по умолчанию'."
+)
+
+_REQUEST_TEMPLATE = (
+    "Вакансия закрыта: {vacancy_title}\n"
+    "Рекрутер: {recruiter_name}\n"
+    "Можете оставить отзыв сейчас?"
+)
+
+_SUMMARY_TEMPLATE = (
+    "Вакансия: {vacancy_title}\n"
+    "Рекрутер: {recruiter_name}\n"
+    "Общая оценка: {overall_rating}\n"
+    "Коммуникация: {comms_rating}\n"
+    "Сроки закрытия: {timeliness_rating}\n"
+    "Релевантность кандидатов: {relevance_rating}\n"
+    "Качество процесса: {process_quality_rating}\n"
+    "Рекомендации: {recommendations}\n\n"
+    "Сохранить отзыв? Ответьте 'да' для сохранения или 'нет' для отмены."
+)
+
+_AFFIRM = frozenset({"да", "yes"})
+_DENY = frozenset({"нет", "no"})
+
+
+class _SendPacer:
+    """Spaces sends at least ``1 / rate`` seconds apart across all callers."""
+
+    def __init__(self, rate: float) -> None:
+        self._interval = 1 / rate
+        self._next_slot = 0.0
+        self._resume_at = 0.0
+
+    async def wait(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            # A pause that started while this caller slept sends it back into the queue.
+            if loop.time() >= self._resume_at:
+                return
+
+    def pause(self, seconds: float) -> None:
+        """Hold every sender for ``seconds``, e.g. after Telegram answers with RetryAfter."""
+        self._resume_at = max(self._resume_at, asyncio.get_running_loop().time() + seconds)
+        self._next_slot = max(self._next_slot, self._resume_at)
+
+
+# Telegram caps bots at ~30 messages per second; stay a little below it.
+_send_pacer = _SendPacer(rate=25)
+_SEND_ATTEMPTS = 3
+
+
+async def send_feedback_request(bot: Bot, ctx: AppContext, vacancy: VacancyAssignment) -> None:
+    users = ctx.user_store.get_many(vacancy.hiring_manager_ids)
+    keyboard = feedback_keyboard(vacancy.vacancy_id)
+    text = _REQUEST_TEMPLATE.format(vacancy_title=vacancy.vacancy_title, recruiter_name=vacancy.recruiter_name)
+
+    async def _send_one(manager_id: int) -> None:
+        user = users.get(manager_id)
+        if user and user.status != "active":
             return
-        await state.update_data(
-            vacancy_id=vacancy.vacancy_id,
-            vacancy_title=vacancy.vacancy_title,
-            recruiter_name=vacancy.recruiter_name,
-            hiring_manager_full_name=user.full_name,
-        )
-        await state.set_state(FeedbackStates.overall_rating)
-        await callback.message.answer("Общая оценка работы рекрутера (1-5)?")
+        for _ in range(_SEND_ATTEMPTS):
+            await _send_pacer.wait()
+            try:
+                # Deliberately not disable_notification: the request asks the manager to act now.
+                await bot.send_message(
+                    manager_id, text, reply_markup=keyboard, parse_mode=None, disable_web_page_preview=True
+                )
+                return
+            except TelegramRetryAfter as exc:
+                # The flood limit is per bot, so hold back the sibling sends as well;
+                # the wait happens in the pacer, only if another attempt follows.
+                _send_pacer.pause(exc.retry_after)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Failed to send feedback request to %s: %s", manager_id, exc)
+                return
+        logger.warning("Gave up sending feedback request to %s: still rate limited", manager_id)
+
+    async with asyncio.TaskGroup() as tg:
+        for manager_id in vacancy.hiring_manager_ids:
+            tg.create_task(_send_one(manager_id))
+
+
+async def start(message: Message) -> None:
+    await message.answer("Здравствуйте! Используйте /register, чтобы подтвердить доступ, или ждите запрос на отзыв.")
+
+
+async def register(message: Message, state: FSMContext, ctx: AppContext) -> None:
+    existing = ctx.user_store.get(message.from_user.id)
+    if existing:
+        await message.answer("Вы уже зарегистрированы. Спасибо!")
+        return
+    await state.set_state(RegistrationStates.waiting_full_name)
+    await message.answer("Укажите ваше ФИО для завершения регистрации.")
+
+
+async def save_full_name(message: Message, state: FSMContext) -> None:
+    await state.update_data(full_name=message.text.strip())
+    await state.set_state(RegistrationStates.waiting_title)
+    await message.answer("Ваша должность?")
+
+
+async def save_title(message: Message, state: FSMContext) -> None:
+    await state.update_data(title=message.text.strip())
+    await state.set_state(RegistrationStates.waiting_contact)
+    await message.answer("Контакт (email/телефон)?")
+
 
-    @router.callback_query(lambda c: c.data and c.data.startswith("remind_feedback:"))
-    async def handle_remind_feedback(callback: CallbackQuery) -> None:
+async def finish_registration(message: Message, state: FSMContext, ctx: AppContext) -> None:
+    data = await state.get_data()
+    user = User(
+        telegram_id=message.from_user.id,
+        full_name=data.get("full_name", message.from_user.full_name or ""),
+        title=data.get("title"),
+        contact=message.text.strip(),
+        permission_level="hiring_manager",
+    )
+    ctx.user_store.upsert(user)
+    await state.clear()
+    await message.answer("Вы успешно зарегистрированы. Спасибо!")
+
+
+async def _begin_feedback(state: FSMContext, vacancy: VacancyAssignment, user: User) -> None:
+    # Start from a clean slate so ratings from an abandoned flow don't carry over.
+    await state.set_data(
+        {
+            "vacancy_id": vacancy.vacancy_id,
+            "vacancy_title": vacancy.vacancy_title,
+            "recruiter_name": vacancy.recruiter_name,
+            "hiring_manager_full_name": user.full_name,
+        }
+    )
+    await state.set_state(FeedbackStates.recruiter)
+
+
+async def handle_feedback_callback(
+    callback: CallbackQuery, callback_data: FeedbackCb, state: FSMContext, ctx: AppContext
+) -> None:
+    if callback_data.action == "remind":
         await callback.answer("Хорошо, напомню позже.")
         # Hook for reminder scheduling can be added here.
-
-    @router.message(Command("feedback"))
-    async def manual_feedback(message: Message, state: FSMContext) -> None:
-        vacancy = VacancyAssignment(
-            vacancy_id="manual",
-            vacancy_title="Manual trigger",
-            recruiter_name="Unknown",
-            hiring_manager_ids=[message.from_user.id],
+        return
+
+    await callback.answer()
+    vacancy = ctx.vacancy_store.get_by_key(callback_data.vacancy)
+    if not vacancy:
+        await callback.message.answer("Не могу найти вакансию. Напишите администратору.")
+        return
+    user = ctx.user_store.get(callback.from_user.id)
+    if not user:
+        await callback.message.answer(
+            f"Вы не зарегистрированы. Напишите администратору ({ctx.settings.admin_contact})."
         )
-        user = await ctx.user_store.get(message.from_user.id)
-        if not user:
-            await message.answer(
-                f"Вы не зарегистрированы. Напишите администратору ({ctx.settings.admin_contact})."
-            )
-            return
-        await ctx.vacancy_store.upsert(vacancy)
-        await state.update_data(
-            vacancy_id=vacancy.vacancy_id,
-            vacancy_title=vacancy.vacancy_title,
-            recruiter_name=vacancy.recruiter_name,
-            hiring_manager_full_name=user.full_name,
-        )
-        await state.set_state(FeedbackStates.overall_rating)
-        await message.answer("Запускаю ручной опрос. Общая оценка работы рекрутера (1-5)?")
+        return
+    await _begin_feedback(state, vacancy, user)
+    await callback.message.answer(_RECRUITER_TEMPLATE.format(recruiter_name=vacancy.recruiter_name))
 
-    async def _validate_rating(message: Message, min_value: int = 1, max_value: int = 5) -> int | None:
-        try:
-            value = int(message.text.strip())
-            if min_value <= value <= max_value:
-                return value
-        except Exception:
-            pass
-        await message.answer(f"Введите число от {min_value} до {max_value}.")
-        return None
-
-    @router.message(FeedbackStates.overall_rating)
-    async def receive_overall(message: Message, state: FSMContext) -> None:
-        rating = await _validate_rating(message)
-        if rating is None:
-            return
-        await state.update_data(overall_rating=rating)
-        data = await state.get_data()
-        await state.set_state(FeedbackStates.recruiter)
+
+async def manual_feedback(message: Message, state: FSMContext, ctx: AppContext) -> None:
+    vacancy = VacancyAssignment(
+        vacancy_id="manual",
+        vacancy_title="Manual trigger",
+        recruiter_name="Unknown",
+        hiring_manager_ids=[message.from_user.id],
+    )
+    user = ctx.user_store.get(message.from_user.id)
+    if not user:
         await message.answer(
-            f"С каким рекрутером вы работали? (по умолчанию: {data.get('recruiter_name')})\n"
-            "Введите имя или напишите 'по умолчанию'."
+            f"Вы не зарегистрированы. Напишите администратору ({ctx.settings.admin_contact})."
         )
+        return
+    ctx.vacancy_store.upsert(vacancy)
+    await _begin_feedback(state, vacancy, user)
+    await message.answer("Запускаю ручной опрос.\n" + _RECRUITER_TEMPLATE.format(recruiter_name=vacancy.recruiter_name))
+
+
+async def receive_recruiter(message: Message, state: FSMContext) -> None:
+    recruiter_name = message.text.strip()
+    data = await state.get_data()
+    if recruiter_name.lower() == "default":
+        recruiter_name = data.get("recruiter_name", "Unknown")
+    data["recruiter_name"] = recruiter_name
+    await state.set_data(data)
+    await state.set_state(FeedbackStates.collecting_ratings)
+    await message.answer(_RATINGS_PROMPT, reply_markup=ratings_keyboard(_selected_ratings(data)))
+
+
+async def receive_rating(callback: CallbackQuery, callback_data: RateCb, state: FSMContext) -> None:
+    question = _RATING_QUESTIONS.get(callback_data.category)
+    if question is None or not 1 <= callback_data.value <= 5:
+        # Row labels carry value 0: show the full question instead of recording a rating.
+        await callback.answer(question)
+        return
+    await callback.answer()
+    data = await state.get_data()
+    if data.get(callback_data.category) == callback_data.value:
+        # Re-tapping the current choice: the markup would not change and Telegram rejects the edit.
+        return
+    data[callback_data.category] = callback_data.value
+    await state.set_data(data)
+    selected = _selected_ratings(data)
+    if None in selected:
+        try:
+            await callback.message.edit_reply_markup(reply_markup=ratings_keyboard(selected))
+        except TelegramBadRequest as exc:
+            # A stale grid from an abandoned flow may already show exactly this markup.
+            if "message is not modified" not in exc.message:
+                raise
+        return
+    await callback.message.edit_text(
+        "Оценки:\n" + "\n".join(f"• {label}: {value}" for (_, label, _), value in zip(_RATING_CATEGORIES, selected))
+    )
+    await state.set_state(FeedbackStates.recommendations)
+    await callback.message.answer("Какие рекомендации по улучшению работы рекрутера? Отправьте текст или голос.")
 
-    @router.message(FeedbackStates.recruiter)
-    async def receive_recruiter(message: Message, state: FSMContext) -> None:
-        recruiter_name = message.text.strip()
-        data = await state.get_data()
-        if recruiter_name.lower() == "default":
-            recruiter_name = data.get("recruiter_name", "Unknown")
-        await state.update_data(recruiter_name=recruiter_name)
-        await state.set_state(FeedbackStates.comms_rating)
-        await message.answer("Как оцениваете коммуникацию с рекрутером? (1-5)")
-
-    @router.message(FeedbackStates.comms_rating)
-    async def receive_comms(message: Message, state: FSMContext) -> None:
-        rating = await _validate_rating(message)
-        if rating is None:
-            return
-        await state.update_data(comms_rating=rating)
-        await state.set_state(FeedbackStates.timeliness_rating)
-        await message.answer("Вакансия закрыта в комфортные сроки? (1-5)")
-
-    @router.message(FeedbackStates.timeliness_rating)
-    async def receive_time(message: Message, state: FSMContext) -> None:
-        rating = await _validate_rating(message)
-        if rating is None:
-            return
-        await state.update_data(timeliness_rating=rating)
-        await state.set_state(FeedbackStates.relevance_rating)
-        await message.answer("Насколько релевантны кандидаты? (1-5)")
-
-    @router.message(FeedbackStates.relevance_rating)
-    async def receive_relevance(message: Message, state: FSMContext) -> None:
-        rating = await _validate_rating(message)
-        if rating is None:
-            return
-        await state.update_data(relevance_rating=rating)
-        await state.set_state(FeedbackStates.process_quality_rating)
-        await message.answer("Как оцениваете качество процесса (ошибки, фидбек, поддержка, HR-интервью)? (1-5)")
-
-    @router.message(FeedbackStates.process_quality_rating)
-    async def receive_process_quality(message: Message, state: FSMContext) -> None:
-        rating = await _validate_rating(message)
-        if rating is None:
-            return
-        await state.update_data(process_quality_rating=rating)
-        await state.set_state(FeedbackStates.recommendations)
-        await message.answer("Какие рекомендации по улучшению работы рекрутера? Отправьте текст или голос.")
-
-    @router.message(FeedbackStates.recommendations)
-    async def receive_recommendations(message: Message, state: FSMContext, bot: Bot) -> None:
-        text: str | None = None
-        if message.voice:
-            if ctx.speech is None:
-                await message.answer("Распознавание речи не настроено. Отправьте текстом, пожалуйста.")
-                return
-            await message.answer("Преобразуем голосовое в текст...")
-            file = await bot.get_file(message.voice.file_id)
-            buffer = await bot.download_file(file.file_path)
-            transcription = await ctx.speech.transcribe_bytes(buffer.read())
-            if not transcription:
-                await message.answer("Не удалось распознать голос. Отправьте текстом, пожалуйста.")
-                return
-            text = transcription
-            await message.answer(f"Транскрипция:\n{text}")
-        elif message.text:
-            text = message.text.strip()
 
-        if not text:
-            await message.answer("Отправьте текст или голосовое с рекомендациями.")
-            return
+async def ratings_reminder(message: Message) -> None:
+    await message.answer("Выберите оценки кнопками под сообщением выше.")
 
-        await state.update_data(recommendations=text, feedback_comment=text)
-        data = await state.get_data()
-        await state.set_state(FeedbackStates.confirm)
-        summary = (
-            f"Вакансия: {data.get('vacancy_title')}\n"
-            f"Рекрутер: {data.get('recruiter_name')}\n"
-            f"Общая оценка: {data.get('overall_rating')}\n"
-            f"Коммуникация: {data.get('comms_rating')}\n"
-            f"Сроки закрытия: {data.get('timeliness_rating')}\n"
-            f"Релевантность кандидатов: {data.get('relevance_rating')}\n"
-            f"Качество процесса: {data.get('process_quality_rating')}\n"
-            f"Рекомендации: {text}\n\n"
-            "Сохранить отзыв? Ответьте 'да' для сохранения или 'нет' для отмены."
-        )
-        await message.answer(summary)
 
-    @router.message(FeedbackStates.confirm)
-    async def confirm(message: Message, state: FSMContext) -> None:
-        decision = (message.text or "").strip().lower()
-        if decision not in {"yes", "no", "да", "нет"}:
-            await message.answer("Ответьте 'да' чтобы сохранить или 'нет' чтобы отменить.")
+async def receive_recommendations(message: Message, state: FSMContext, bot: Bot, ctx: AppContext) -> None:
+    text: str | None = None
+    if message.voice:
+        if ctx.speech is None:
+            await message.answer("Распознавание речи не настроено. Отправьте текстом, пожалуйста.")
             return
-        if decision in {"no", "нет"}:
-            await state.clear()
-            await message.answer("Отзыв отменен.")
+        await message.answer("Преобразуем голосовое в текст...")
+        buffer = io.BytesIO()
+        await bot.download(message.voice, destination=buffer)
+        try:
+            transcription = await ctx.speech.transcribe_stream(buffer, message.voice.duration)
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Speech recognition failed: %s", exc)
+            transcription = None
+        if not transcription:
+            await message.answer("Не удалось распознать голос. Отправьте текстом, пожалуйста.")
             return
+        text = transcription
+        await message.answer(f"Транскрипция:\n{text}")
+    elif message.text:
+        text = message.text.strip()
+
+    if not text:
+        await message.answer("Отправьте текст или голосовое с рекомендациями.")
+        return
+
+    data = await state.update_data(recommendations=text, feedback_comment=text)
+    await state.set_state(FeedbackStates.confirm)
+    summary = _SUMMARY_TEMPLATE.format_map(defaultdict(str, data))
+    await message.answer(summary)
 
-        data = await state.get_data()
-        record = FeedbackRecord(
-            vacancy_id=data.get("vacancy_id", ""),
-            vacancy_title=data.get("vacancy_title", ""),
-            recruiter_name=data.get("recruiter_name", ""),
-            hiring_manager_full_name=data.get("hiring_manager_full_name", message.from_user.full_name or ""),
-            telegram_user_id=message.from_user.id,
-            feedback_comment=data.get("feedback_comment", ""),
-            overall_rating=data.get("overall_rating", 0),
-            comms_rating=data.get("comms_rating", 0),
-            timeliness_rating=data.get("timeliness_rating", 0),
-            relevance_rating=data.get("relevance_rating", 0),
-            process_quality_rating=data.get("process_quality_rating", 0),
-            recommendations=data.get("recommendations", ""),
-            submitted_at=datetime.utcnow(),
-        )
-        if ctx.sheets:
-            try:
-                ctx.sheets.append_feedback(record)
-            except Exception as exc:  # noqa: BLE001
-                logger.error("Failed to write to Google Sheets: %s", exc)
-                await message.answer("Не удалось сохранить в Google Sheets. Администратор уведомлен.")
-                await ctx.feedback_buffer.add(record)
-        else:
-            await ctx.feedback_buffer.add(record)
-            logger.warning("Google Sheets client not configured. Feedback buffered locally.")
-        await state.clear()
-        await message.answer("Спасибо за обратную связь! Это очень важно для нашей команды.")
 
+async def confirm(message: Message, state: FSMContext, ctx: AppContext) -> None:
+    decision = (message.text or "").strip().lower()
+    if decision in _DENY:
+        await state.clear()
+        await message.answer("Отзыв отменен.")
+        return
+    if decision not in _AFFIRM:
+        await message.answer("Ответьте 'да' чтобы сохранить или 'нет' чтобы отменить.")
+        return
+
+    data = await state.get_data()
+    record = FeedbackRecord(
+        vacancy_id=data.get("vacancy_id", ""),
+        vacancy_title=data.get("vacancy_title", ""),
+        recruiter_name=data.get("recruiter_name", ""),
+        hiring_manager_full_name=data.get("hiring_manager_full_name", message.from_user.full_name or ""),
+        telegram_user_id=message.from_user.id,
+        feedback_comment=data.get("feedback_comment", ""),
+        overall_rating=data.get("overall_rating", 0),
+        comms_rating=data.get("comms_rating", 0),
+        timeliness_rating=data.get("timeliness_rating", 0),
+        relevance_rating=data.get("relevance_rating", 0),
+        process_quality_rating=data.get("process_quality_rating", 0),
+        recommendations=data.get("recommendations", ""),
+        submitted_at=datetime.now(UTC),
+    )
+    ctx.feedback_buffer.add(record)
+    if ctx.batcher:
+        await ctx.batcher.submit(record)
+    else:
+        logger.warning("Google Sheets client not configured. Feedback buffered locally.")
+    await state.clear()
+    await message.answer("Спасибо за обратную связь! Это очень важно для нашей команды.")
+
+
+def create_router() -> Router:
+    """Build a fresh router with all bot handlers, so each dispatcher gets its own."""
+    router = Router(name=__name__)
+    router.message.register(start, CommandStart())
+    router.message.register(register, Command("register"))
+    router.message.register(save_full_name, RegistrationStates.waiting_full_name)
+    router.message.register(save_title, RegistrationStates.waiting_title)
+    router.message.register(finish_registration, RegistrationStates.waiting_contact)
+    router.callback_query.register(handle_feedback_callback, FeedbackCb.filter())
+    router.message.register(manual_feedback, Command("feedback"))
+    router.message.register(receive_recruiter, FeedbackStates.recruiter)
+    router.callback_query.register(receive_rating, FeedbackStates.collecting_ratings, RateCb.filter())
+    router.message.register(ratings_reminder, FeedbackStates.collecting_ratings)
+    router.message.register(receive_recommendations, FeedbackStates.recommendations)
+    router.message.register(confirm, FeedbackStates.confirm)
+    return router
+
+
+def register_handlers(dispatcher: Dispatcher, ctx: AppContext) -> None:
+    """Attach the bot handlers; ``ctx`` reaches them through the dispatcher's workflow data."""
+    dispatcher["ctx"] = ctx
+    dispatcher.include_router(create_router())
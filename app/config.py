@@ -1,10 +1,11 @@
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
-    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", frozen=True, extra="ignore")
 
     telegram_token: str = Field(..., env="TELEGRAM_TOKEN")
     telegram_webhook_path: str = Field("/telegram/korus-feedback", env="TELEGRAM_WEBHOOK_PATH")
@@ -18,6 +19,8 @@ class Settings(BaseSettings):
     )
     sheets_webhook_key: str = Field("", env="SHEETS_WEBHOOK_KEY")
 
+    redis_url: str | None = Field(default=None, env="REDIS_URL")
+
     friendwork_secret: str = Field("fw_korus_feedback_2025_secret", env="FRIENDWORK_SECRET")
 
     speech_language_code: str = Field("en-US", env="SPEECH_LANGUAGE_CODE")
@@ -25,5 +28,6 @@ class Settings(BaseSettings):
     reminder_minutes: int = Field(180, env="REMINDER_MINUTES")
 
 
+@lru_cache(maxsize=1)
 def load_settings() -> Settings:
     return Settings()
@@ -1,9 +1,11 @@
+import hmac
 import logging
 from typing import List, Optional
 
 from aiogram import Bot, Dispatcher
 from fastapi import APIRouter, HTTPException, Request
-from pydantic import BaseModel
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
 
 from .bot import AppContext, send_feedback_request
 from .models import VacancyAssignment
@@ -34,15 +36,28 @@ def create_friendwork_router(
         except Exception as exc:  # noqa: BLE001
             logger.error("Failed to notify admin: %s", exc)
 
-    @router.post("/friendwork/webhook")
-    async def friendwork_webhook(payload: FriendWorkEvent, request: Request) -> dict:
+    # The body is parsed by hand from raw bytes, so describe it for OpenAPI explicitly.
+    @router.post(
+        "/friendwork/webhook",
+        openapi_extra={
+            "requestBody": {
+                "required": True,
+                "content": {"application/json": {"schema": FriendWorkEvent.model_json_schema()}},
+            }
+        },
+    )
+    async def friendwork_webhook(request: Request) -> dict:
         secret = request.headers.get("x-friendwork-secret")
-        if secret != ctx.settings.friendwork_secret:
+        if not hmac.compare_digest((secret or "").encode(), ctx.settings.friendwork_secret.encode()):
             raise HTTPException(status_code=401, detail="Invalid signature")
+        try:
+            payload = FriendWorkEvent.model_validate_json(await request.body())
+        except ValidationError as exc:
+            errors = [{**error, "loc": ("body", *error["loc"])} for error in exc.errors()]
+            raise RequestValidationError(errors) from exc
 
-        if await event_store.seen(payload.event_id):
+        if event_store.check_and_mark(payload.event_id):
             return {"status": "duplicate"}
-        await event_store.mark(payload.event_id)
 
         vacancy = VacancyAssignment(
             vacancy_id=payload.vacancy_id,
@@ -50,13 +65,17 @@ def create_friendwork_router(
             recruiter_name=payload.recruiter_name,
             hiring_manager_ids=payload.hiring_manager_ids,
         )
-        await ctx.vacancy_store.upsert(vacancy)
+        ctx.vacancy_store.upsert(vacancy)
 
         if not vacancy.hiring_manager_ids:
-            await notify_admin(f"No hiring managers found for vacancy {vacancy.vacancy_id}")
+            ctx.spawn(
+                notify_admin(f"No hiring managers found for vacancy {vacancy.vacancy_id}"),
+                name=f"notify-admin:{vacancy.vacancy_id}",
+            )
             return {"status": "no_managers"}
 
-        await send_feedback_request(bot, ctx, vacancy)
+        # Respond to FriendWork right away; the Telegram fan-out continues in the background.
+        ctx.spawn(send_feedback_request(bot, ctx, vacancy), name=f"feedback-request:{vacancy.vacancy_id}")
         return {"status": "ok"}
 
     return router
@@ -1,24 +1,82 @@
+import asyncio
+import atexit
+import contextlib
+import hmac
 import logging
-from typing import Optional
+import logging.handlers
+import queue
+from typing import AsyncIterator, List, Optional
 
+import orjson
 from aiogram import Bot, Dispatcher
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import Update
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 
+from .batch import FeedbackBatcher
 from .bot import AppContext, register_handlers
 from .config import load_settings
 from .friendwork import create_friendwork_router
+from .models import FeedbackRecord
 from .sheets import GoogleSheetClient
-from .speech import SpeechToText
+from .speech import SpeechToText, shutdown_speech_executor
 from .storage import EventStore, FeedbackBuffer, UserStore, VacancyStore
 
-logging.basicConfig(level=logging.INFO)
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    # The queue never leaves the process, so hand records over untouched and let
+    # the real handler's formatter (e.g. uvicorn's access formatter) see the args.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _move_handlers_to_listener(target: logging.Logger) -> None:
+    """Put ``target``'s handlers behind a queue so their I/O runs on a listener thread."""
+    handlers = [h for h in target.handlers if not isinstance(h, logging.handlers.QueueHandler)]
+    if not handlers:
+        return
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    target.handlers = [_LocalQueueHandler(log_queue)]
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+
+def _configure_logging() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    # uvicorn sets up its own non-propagating loggers before importing the app;
+    # "uvicorn.access" writes a line per request, so it goes through a queue as well.
+    for name in ("", "uvicorn", "uvicorn.access"):
+        _move_handlers_to_listener(logging.getLogger(name))
+
+
+_configure_logging()
 logger = logging.getLogger(__name__)
 
 settings = load_settings()
-bot = Bot(token=settings.telegram_token)
-dp = Dispatcher(storage=MemoryStorage())
+
+
+def _create_fsm_storage() -> BaseStorage:
+    if not settings.redis_url:
+        return MemoryStorage()
+    # Shared FSM state lets several workers serve the same users.
+    from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+    from redis.asyncio import ConnectionPool, Redis
+
+    pool = ConnectionPool.from_url(settings.redis_url, max_connections=50)
+    return RedisStorage(
+        redis=Redis(connection_pool=pool),
+        key_builder=DefaultKeyBuilder(with_bot_id=True),
+        json_loads=orjson.loads,
+        json_dumps=orjson.dumps,
+    )
+
+
+# All bot texts are plain, so no default parse mode is set.
+bot = Bot(token=settings.telegram_token, parse_mode=None)
+dp = Dispatcher(storage=_create_fsm_storage())
 
 sheets_client: Optional[GoogleSheetClient] = None
 if settings.sheets_webhook_url:
@@ -32,6 +90,39 @@ try:
 except Exception as exc:  # noqa: BLE001
     logger.warning("Speech-to-text not initialized: %s", exc)
 
+
+def _split_message(lines: List[str], limit: int = 4096) -> List[str]:
+    """Pack ``lines`` into Telegram-sized messages, splitting lines longer than ``limit``."""
+    messages: List[str] = []
+    current = ""
+    for line in lines:
+        for start in range(0, max(len(line), 1), limit):
+            piece = line[start : start + limit]
+            if current and len(current) + 1 + len(piece) > limit:
+                messages.append(current)
+                current = piece
+            else:
+                current = f"{current}\n{piece}" if current else piece
+    if current:
+        messages.append(current)
+    return messages
+
+
+async def _report_unsaved_feedback(records: List[FeedbackRecord]) -> None:
+    """Send feedback the sheet never accepted to the admin chat, one row per line."""
+    rows = ["\t".join(str(value) for value in record.row) for record in records]
+    if settings.admin_chat_id is not None:
+        try:
+            for text in _split_message(["Не удалось сохранить отзывы в Google Sheets, внесите вручную:", *rows]):
+                await bot.send_message(settings.admin_chat_id, text)
+            logger.error("Gave up on %s feedback records; sent them to the admin chat", len(records))
+            return
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Failed to send unsaved feedback to the admin chat: %s", exc)
+    # Last resort: the log is then the only durable copy of these rows.
+    logger.error("Unsaved feedback rows (%s):\n%s", len(records), "\n".join(rows))
+
+
 user_store = UserStore()
 vacancy_store = VacancyStore()
 feedback_buffer = FeedbackBuffer()
@@ -44,12 +135,31 @@ ctx = AppContext(
     feedback_buffer=feedback_buffer,
     sheets=sheets_client,
     speech=speech_client,
+    batcher=FeedbackBatcher(sheets_client, on_failure=_report_unsaved_feedback) if sheets_client else None,
 )
 
 router = create_friendwork_router(ctx, bot, dp, event_store)
 register_handlers(dp, ctx)
 
-app = FastAPI()
+
+@contextlib.asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    if ctx.batcher:
+        ctx.batcher.start()
+    try:
+        yield
+    finally:
+        if ctx.background_tasks:
+            await asyncio.gather(*ctx.background_tasks, return_exceptions=True)
+        if ctx.batcher:
+            await ctx.batcher.stop()
+        if sheets_client is not None:
+            await sheets_client.aclose()
+        await dp.storage.close()
+        shutdown_speech_executor()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 app.include_router(router)
 
 
@@ -61,16 +171,18 @@ async def health() -> dict:
 @app.post(settings.telegram_webhook_path)
 async def telegram_webhook(request: Request) -> dict:
     secret = request.headers.get("x-telegram-bot-api-secret-token")
-    if secret != settings.telegram_webhook_secret:
+    if not hmac.compare_digest((secret or "").encode(), settings.telegram_webhook_secret.encode()):
         raise HTTPException(status_code=401, detail="Invalid Telegram secret token")
-    update = Update.model_validate(await request.json())
+    # The bot context lets feed_update use the update as-is instead of re-validating it.
+    update = Update.model_validate_json(await request.body(), context={"bot": bot})
     await dp.feed_update(bot, update)
     return {"status": "ok"}
 
 
 # This allows running polling in development if you prefer.
 async def run_polling() -> None:
-    await dp.start_polling(bot)
+    async with lifespan(app):
+        await dp.start_polling(bot)
 
 
 __all__ = ["app", "bot", "dp", "run_polling"]
@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import List
 
 
-@dataclass
+@dataclass(slots=True)
 class User:
     telegram_id: int
     full_name: str
@@ -13,7 +13,7 @@ class User:
     status: str = "active"
 
 
-@dataclass
+@dataclass(slots=True)
 class VacancyAssignment:
     vacancy_id: str
     vacancy_title: str
@@ -21,7 +21,7 @@ class VacancyAssignment:
     hiring_manager_ids: List[int] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class FeedbackRecord:
     vacancy_id: str
     vacancy_title: str
@@ -36,3 +36,21 @@ class FeedbackRecord:
     process_quality_rating: int
     recommendations: str
     submitted_at: datetime
+    # Sheet columns A-I, in order: Вакансия, Нанимающий менеджер,
+    # Рекомендации по улучшению работы рекрутера, Рекрутер, Общая оценка работа рекрутера? (1-5),
+    # Как оцениваете коммуникацию с рекрутером? (1-5), Вакансия закрыта в комфортные сроки? (1-5),
+    # Насколько релевантны кандидаты? (1-5), Как оцениваете качество процесса? (1-5).
+    row: List = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.row = [
+            self.vacancy_title or self.vacancy_id,
+            self.hiring_manager_full_name,
+            self.recommendations or self.feedback_comment,
+            self.recruiter_name,
+            self.overall_rating,
+            self.comms_rating,
+            self.timeliness_rating,
+            self.relevance_rating,
+            self.process_quality_rating,
+        ]
@@ -1,93 +1,90 @@
 import logging
-from dataclasses import asdict
-from typing import Optional
+from typing import List
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential
+import orjson
+from tenacity import (
+    RetryCallState,
+    retry,
+    retry_if_exception_type,
+    retry_if_result,
+    stop_after_attempt,
+    stop_after_delay,
+    wait_exponential_jitter,
+)
 
 from .models import FeedbackRecord
 
 logger = logging.getLogger(__name__)
 
+# Transient failures worth another attempt; other 4xx mean the payload itself is bad.
+_RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.PoolTimeout)
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class SheetWebhookError(Exception):
+    """The webhook answered, but did not confirm that the rows were appended."""
+
+
+def _last_outcome(retry_state: RetryCallState) -> httpx.Response:
+    # Once retries run out, return the last response (or re-raise the last error).
+    return retry_state.outcome.result()
+
 
 class SheetWebhookClient:
+    __slots__ = ("webhook_url", "webhook_key", "_client", "_params")
+
     def __init__(self, webhook_url: str, webhook_key: str) -> None:
         self.webhook_url = webhook_url
         self.webhook_key = webhook_key
-
-    @retry(wait=wait_exponential(multiplier=1, min=1, max=10), stop=stop_after_attempt(3))
-    def append_feedback(self, record: FeedbackRecord) -> None:
-        params = {"key": self.webhook_key or ""}
-
-        payload = {
-            "vacancy": record.vacancy_title or record.vacancy_id,
-            "vacancy_id": record.vacancy_id,
-            "hiring_manager": record.hiring_manager_full_name,
-            "comment": record.feedback_comment,
-            "recruiter": record.recruiter_name,
-            "overall": record.overall_rating,
-            "overall_rating": record.overall_rating,
-            "comms_rating": record.comms_rating,
-            "timeliness_rating": record.timeliness_rating,
-            "relevance_rating": record.relevance_rating,
-            "process_quality_rating": record.process_quality_rating,
-            "recommendations": record.recommendations,
-            "submitted_at": record.submitted_at.isoformat(),
-            "telegram_user_id": record.telegram_user_id,
-            "source": "telegram-bot",
-            # Row mapped to the new sheet headers (A-I):
-            "row": [
-                record.vacancy_title or record.vacancy_id,
-                record.hiring_manager_full_name,
-                record.recommendations or record.feedback_comment,
-                record.recruiter_name,
-                record.overall_rating,
-                record.comms_rating,
-                record.timeliness_rating,
-                record.relevance_rating,
-                record.process_quality_rating,
-            ],
-            # Explicit column names to help Apps Script map the row
-            "columns": [
-                "Вакансия",
-                "Нанимающий менеджер",
-                "Рекомендации по улучшению работы рекрутера",
-                "Рекрутер",
-                "Общая оценка работа рекрутера? (1-5)",
-                "Как оцениваете коммуникацию с рекрутером? (1-5)",
-                "Вакансия закрыта в комфортные сроки? (1-5)",
-                "Насколько релевантны кандидаты? (1-5)",
-                "Как оцениваете качество процесса? (1-5)",
-            ],
-            # Duplicate row under a generic "values" key in case the script expects that
-            "values": [
-                record.vacancy_title or record.vacancy_id,
-                record.hiring_manager_full_name,
-                record.recommendations or record.feedback_comment,
-                record.recruiter_name,
-                record.overall_rating,
-                record.comms_rating,
-                record.timeliness_rating,
-                record.relevance_rating,
-                record.process_quality_rating,
-            ],
-        }
-
-        resp = httpx.post(
-            self.webhook_url,
-            params=params,
-            json=payload,
-            timeout=15,
+        self._params = {"key": webhook_key or ""}
+        self._client = httpx.AsyncClient(
+            # Split timeouts so a slow Apps Script run doesn't leave writes queued behind the pool.
+            timeout=httpx.Timeout(connect=5.0, read=15.0, write=5.0, pool=10.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60.0),
             headers={"Content-Type": "application/json"},
             follow_redirects=True,
+            http2=True,
         )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    @retry(
+        retry=retry_if_exception_type(_RETRY_EXCEPTIONS)
+        | retry_if_result(lambda resp: resp.status_code in _RETRY_STATUSES),
+        wait=wait_exponential_jitter(initial=0.5, max=8),
+        stop=stop_after_attempt(4) | stop_after_delay(30),
+        retry_error_callback=_last_outcome,
+    )
+    async def _post(self, payload: dict) -> httpx.Response:
+        return await self._client.post(self.webhook_url, params=self._params, content=orjson.dumps(payload))
+
+    async def _send(self, payload: dict) -> httpx.Response:
+        resp = await self._post(payload)
         if resp.status_code >= 400:
             logger.error("Sheet webhook failed (%s): %s", resp.status_code, resp.text)
             resp.raise_for_status()
-        logger.info("Sent feedback to sheet webhook for vacancy %s (status %s)", record.vacancy_id, resp.status_code)
+        # Apps Script always answers 200, so the script reports the outcome in the body.
+        try:
+            result = orjson.loads(resp.content)
+        except orjson.JSONDecodeError:
+            result = None
+        if not isinstance(result, dict) or result.get("ok") is not True:
+            logger.error("Sheet webhook rejected the request: %s", resp.text[:500])
+            raise SheetWebhookError(f"Sheet webhook did not confirm the write: {resp.text[:200]}")
+        return resp
+
+    async def append_feedback_batch(self, records: List[FeedbackRecord]) -> None:
+        """Append several records in one request; the script appends ``rows`` in order."""
+        payload = {"rows": [record.row for record in records]}
+        resp = await self._send(payload)
+        logger.debug("Sent %s feedback rows to sheet webhook (status %s)", len(records), resp.status_code)
 
 
 class GoogleSheetClient(SheetWebhookClient):
     """
     Backward-compatible client name. Uses the Apps Script webhook under the hood.
     """
+
+    __slots__ = ()
@@ -1,24 +1,71 @@
 import asyncio
-import io
 import logging
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import BinaryIO, Optional
 
 from google.cloud import speech
+from google.cloud.speech_v1.services.speech.transports import SpeechGrpcTransport
 
 logger = logging.getLogger(__name__)
 
+# Synchronous recognize accepts at most 1 minute of audio; longer Telegram voice
+# notes (OGG/Opus, 48 kHz mono) go through long_running_recognize.
+_SYNC_MAX_SECONDS = 55
+_LONG_RUNNING_TIMEOUT = 300
+
+# Own pool so a burst of voice notes can't starve other blocking work on the default executor.
+_SPEECH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="speech")
+
+
+def shutdown_speech_executor() -> None:
+    _SPEECH_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache(maxsize=1)
+def _speech_client() -> speech.SpeechClient:
+    """Process-wide client, so each voice note reuses one gRPC channel instead of a new handshake."""
+    channel = SpeechGrpcTransport.create_channel(
+        "speech.googleapis.com:443",
+        options=[
+            # Pings only run while a call is active, catching a dead connection mid-recognition.
+            ("grpc.keepalive_time_ms", 30_000),
+            ("grpc.keepalive_timeout_ms", 10_000),
+            ("grpc.max_send_message_length", -1),
+            ("grpc.max_receive_message_length", -1),
+        ],
+    )
+    return speech.SpeechClient(transport=SpeechGrpcTransport(channel=channel))
+
 
 class SpeechToText:
     def __init__(self, language_code: str = "en-US") -> None:
         self.language_code = language_code
-        self._client = speech.SpeechClient()
+        self._client = _speech_client()
+        self._config = self._build_config("latest_short")
+        self._long_config = self._build_config("latest_long")
+
+    def _build_config(self, model: str) -> speech.RecognitionConfig:
+        return speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.OGG_OPUS,
+            sample_rate_hertz=48000,
+            audio_channel_count=1,
+            language_code=self.language_code,
+            enable_automatic_punctuation=True,
+            model=model,
+        )
 
-    async def transcribe_bytes(self, audio_bytes: bytes) -> Optional[str]:
-        def _recognize() -> Optional[str]:
-            audio = speech.RecognitionAudio(content=audio_bytes)
-            config = speech.RecognitionConfig(language_code=self.language_code, enable_automatic_punctuation=True)
-            response = self._client.recognize(config=config, audio=audio)
-            transcripts = [result.alternatives[0].transcript for result in response.results if result.alternatives]
-            return " ".join(transcripts).strip() if transcripts else None
+    def _recognize(self, audio_bytes: bytes, duration: int) -> Optional[str]:
+        audio = speech.RecognitionAudio(content=audio_bytes)
+        if duration > _SYNC_MAX_SECONDS:
+            operation = self._client.long_running_recognize(config=self._long_config, audio=audio)
+            response = operation.result(timeout=_LONG_RUNNING_TIMEOUT)
+        else:
+            response = self._client.recognize(config=self._config, audio=audio)
+        transcripts = [result.alternatives[0].transcript for result in response.results if result.alternatives]
+        return " ".join(transcripts).strip() if transcripts else None
 
-        return await asyncio.to_thread(_recognize)
+    async def transcribe_stream(self, reader: BinaryIO, duration: int) -> Optional[str]:
+        """Transcribe ``duration`` seconds of audio from a file-like object; the read happens in the worker thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_SPEECH_EXECUTOR, lambda: self._recognize(reader.read(), duration))
@@ -1,69 +1,143 @@
 from __future__ import annotations
 
-import asyncio
-from typing import Dict, Iterable, List, Optional
+import hashlib
+import math
+import time
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Deque, Dict, Iterable, List, Optional
 
 from .models import FeedbackRecord, User, VacancyAssignment
 
 
 class UserStore:
     def __init__(self) -> None:
-        self._lock = asyncio.Lock()
         self._users: Dict[int, User] = {}
 
-    async def get(self, telegram_id: int) -> Optional[User]:
-        async with self._lock:
-            return self._users.get(telegram_id)
+    def get(self, telegram_id: int) -> Optional[User]:
+        return self._users.get(telegram_id)
 
-    async def upsert(self, user: User) -> None:
-        async with self._lock:
+    def get_many(self, telegram_ids: Iterable[int]) -> Dict[int, User]:
+        return {tid: self._users[tid] for tid in telegram_ids if tid in self._users}
+
+    def upsert(self, user: User) -> None:
+        self._users[user.telegram_id] = user
+
+    def bulk_upsert(self, users: Iterable[User]) -> None:
+        for user in users:
             self._users[user.telegram_id] = user
 
-    async def bulk_upsert(self, users: Iterable[User]) -> None:
-        async with self._lock:
-            for user in users:
-                self._users[user.telegram_id] = user
+
+def vacancy_key(vacancy_id: str) -> str:
+    """Short key for ``vacancy_id`` that is safe to put into Telegram callback data."""
+    return hashlib.blake2b(vacancy_id.encode(), digest_size=8).hexdigest()
 
 
 class VacancyStore:
     def __init__(self) -> None:
-        self._lock = asyncio.Lock()
         self._vacancies: Dict[str, VacancyAssignment] = {}
+        self._ids_by_key: Dict[str, str] = {}
 
-    async def upsert(self, vacancy: VacancyAssignment) -> None:
-        async with self._lock:
-            self._vacancies[vacancy.vacancy_id] = vacancy
+    def upsert(self, vacancy: VacancyAssignment) -> None:
+        # Webhook retries usually resend an identical vacancy; keep the stored object then.
+        if self._vacancies.get(vacancy.vacancy_id) == vacancy:
+            return
+        self._vacancies[vacancy.vacancy_id] = vacancy
+        self._ids_by_key[vacancy_key(vacancy.vacancy_id)] = vacancy.vacancy_id
 
-    async def get(self, vacancy_id: str) -> Optional[VacancyAssignment]:
-        async with self._lock:
-            return self._vacancies.get(vacancy_id)
+    def get(self, vacancy_id: str) -> Optional[VacancyAssignment]:
+        return self._vacancies.get(vacancy_id)
 
+    def get_by_key(self, key: str) -> Optional[VacancyAssignment]:
+        vacancy_id = self._ids_by_key.get(key)
+        return self._vacancies.get(vacancy_id) if vacancy_id is not None else None
 
-class EventStore:
-    def __init__(self) -> None:
-        self._lock = asyncio.Lock()
-        self._seen: set[str] = set()
 
-    async def seen(self, event_id: str) -> bool:
-        async with self._lock:
-            return event_id in self._seen
+class _BloomFilter:
+    """Fixed-size Bloom filter over strings, backed by a bytearray."""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self._bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._hashes = max(1, round(self._bits / capacity * math.log(2)))
+        self._array = bytearray((self._bits + 7) // 8)
 
-    async def mark(self, event_id: str) -> None:
-        async with self._lock:
-            self._seen.add(event_id)
+    def positions(self, item: str) -> tuple[int, ...]:
+        """Bit positions for ``item``; filters built with the same sizing share them."""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return tuple((h1 + i * h2) % self._bits for i in range(self._hashes))
+
+    def add(self, positions: tuple[int, ...]) -> None:
+        for pos in positions:
+            self._array[pos >> 3] |= 1 << (pos & 7)
+
+    def contains(self, positions: tuple[int, ...]) -> bool:
+        return all(self._array[pos >> 3] & (1 << (pos & 7)) for pos in positions)
+
+
+class EventStore:
+    """Remembers webhook event ids to drop redeliveries.
+
+    Ids live in a pair of rotating Bloom filters (current + previous window, so
+    an id is remembered for at least ``ttl`` seconds) with a small exact FIFO of
+    ids marked within the last ``ttl`` seconds in front, so retries of recent
+    events never depend on the filter's false-positive rate. A false positive
+    only drops a new event as a duplicate.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1_000_000,
+        error_rate: float = 0.001,
+        ttl: float = 86_400,
+        recent_size: int = 512,
+    ) -> None:
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._ttl = ttl
+        self._recent_size = recent_size
+        # event id -> time it was marked, oldest first.
+        self._recent: OrderedDict[str, float] = OrderedDict()
+        self._active = _BloomFilter(capacity, error_rate)
+        self._previous = _BloomFilter(capacity, error_rate)
+        self._rotate_at = time.monotonic() + ttl
+
+    def check_and_mark(self, event_id: str) -> bool:
+        """Record ``event_id`` and return True if it was already seen."""
+        now = time.monotonic()
+        if now >= self._rotate_at:
+            self._previous = self._active
+            self._active = _BloomFilter(self._capacity, self._error_rate)
+            self._rotate_at = now + self._ttl
+
+        recent = self._recent
+        expired_before = now - self._ttl
+        while recent and next(iter(recent.values())) <= expired_before:
+            recent.popitem(last=False)
+        if event_id in recent:
+            return True
+
+        # Both filters share sizing, so the digest is computed once for all three steps.
+        positions = self._active.positions(event_id)
+        if self._active.contains(positions) or self._previous.contains(positions):
+            return True
+
+        self._active.add(positions)
+        recent[event_id] = now
+        if len(recent) > self._recent_size:
+            recent.popitem(last=False)
+        return False
 
 
 class FeedbackBuffer:
     """Keeps recent feedback for debugging or fallback storage."""
 
-    def __init__(self) -> None:
-        self._lock = asyncio.Lock()
-        self._items: List[FeedbackRecord] = []
+    def __init__(self, max_items: int = 1024) -> None:
+        self._items: Deque[FeedbackRecord] = deque(maxlen=max_items)
 
-    async def add(self, record: FeedbackRecord) -> None:
-        async with self._lock:
-            self._items.append(record)
+    def add(self, record: FeedbackRecord) -> None:
+        self._items.append(record)
 
-    async def list_recent(self, limit: int = 20) -> List[FeedbackRecord]:
-        async with self._lock:
-            return list(self._items[-limit:])
+    def list_recent(self, limit: int = 20) -> List[FeedbackRecord]:
+        return list(islice(self._items, max(0, len(self._items) - limit), None))